@@ -19,10 +19,12 @@ from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import wraps
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'food-alert-secret-key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///food_alert.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('FOOD_ALERT_DATABASE_URI', 'sqlite:///food_alert.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
@@ -114,6 +116,9 @@ class UserAlert(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Inbox reads walk one recipient's alerts newest-first
+    __table_args__ = (db.Index('ix_user_alert_recipient_created', 'recipient_id', 'created_at', 'id'),)
+    
     sender = db.relationship('User', foreign_keys=[sender_id], backref=db.backref('sent_alerts', lazy=True))
     recipient = db.relationship('User', foreign_keys=[recipient_id], backref=db.backref('received_alerts', lazy=True))
     
@@ -147,6 +152,7 @@ class FoodPost(db.Model):
     user = db.relationship('User', backref=db.backref('food_posts', lazy=True))
     comments = db.relationship('FoodPostComment', backref='food_post', lazy=True, cascade='all, delete-orphan')
     likes = db.relationship('FoodPostLike', backref='food_post', lazy=True, cascade='all, delete-orphan')
+    rank = db.relationship('FoodPostRank', backref='food_post', uselist=False, lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -194,6 +200,19 @@ class FoodPostLike(db.Model):
     
     user = db.relationship('User', backref=db.backref('food_post_likes', lazy=True))
 
+class FoodPostRank(db.Model):
+    """Precomputed feed score per post, kept current on post, like and comment events"""
+    post_id = db.Column(db.Integer, db.ForeignKey('food_post.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    food_type = db.Column(db.String(100), nullable=False)
+    score = db.Column(db.Float, nullable=False, index=True)
+    
+    # Ranked pages are read straight off these indexes instead of sorting every post
+    __table_args__ = (
+        db.Index('ix_food_post_rank_type_score', 'food_type', 'score'),
+        db.Index('ix_food_post_rank_user_score', 'user_id', 'score'),
+    )
+
 # Simple ML Components (without complex dependencies)
 class FoodRecommendationEngine:
     def __init__(self):
@@ -220,7 +239,7 @@ class FoodRecommendationEngine:
     
     def get_recommendations(self, user_preferences, user_location, limit=5):
         """Get food recommendations based on user preferences and location"""
-        if not self.food_vectors or not self.food_data:
+        if self.food_vectors is None or not self.food_data:
             return []
         
         try:
@@ -278,9 +297,146 @@ class FoodRecommendationEngine:
         
         return max(category_scores, key=category_scores.get) if category_scores else 'other'
 
+# Admission control for expensive endpoints
+class AdmissionGate:
+    """Bounds the work an expensive endpoint may have in flight.
+    
+    Each call asks for some cost units out of a fixed capacity. Calls that don't fit
+    wait in a bounded queue for at most max_wait seconds; when the queue is full or
+    the wait runs out the call is shed so the caller can answer with a quick 503.
+    """
+    def __init__(self, name, capacity, max_queue, max_wait, retry_after=2):
+        self.name = name
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.in_use = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self, cost=1):
+        """Return True once cost units are held, or False if the call was shed"""
+        cost = min(cost, self.capacity)
+        with self._condition:
+            if self.in_use + cost > self.capacity:
+                if self.queued >= self.max_queue:
+                    self.shed += 1
+                    return False
+                
+                self.queued += 1
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self.in_use + cost <= self.capacity, timeout=self.max_wait
+                    )
+                finally:
+                    self.queued -= 1
+                
+                if not admitted:
+                    self.shed += 1
+                    return False
+            
+            self.in_use += cost
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+    
+    def release(self, cost=1):
+        cost = min(cost, self.capacity)
+        with self._condition:
+            self.in_use -= cost
+            self.in_flight -= 1
+            self._condition.notify_all()
+    
+    def stats(self):
+        with self._condition:
+            return {
+                'capacity': self.capacity,
+                'in_use': self.in_use,
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'shed': self.shed
+            }
+
+def shed_response(gate):
+    """Fast rejection for a call an AdmissionGate turned away"""
+    response = jsonify({'error': 'Server is busy, please retry shortly', 'endpoint': gate.name})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(gate.retry_after)
+    return response
+
+def admission_controlled(gate, cost=lambda: 1):
+    """Run a view only when gate admits it; cost() is evaluated per request and 0 skips the gate"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            units = cost()
+            if units <= 0:
+                return view(*args, **kwargs)
+            if not gate.acquire(units):
+                return shed_response(gate)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                gate.release(units)
+        return wrapper
+    return decorator
+
 # Initialize ML engine
 ml_engine = FoodRecommendationEngine()
 
+# TF-IDF refits and scoring run on a dedicated worker so they never overlap on the
+# shared engine and a burst of recommendation calls can't pin every request thread
+ml_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ml')
+
+# Longest a request waits on the ML worker before giving up on a live result
+ML_RESULT_TIMEOUT = 10
+
+# Postings known to be taken, so repeat claims during a food drop skip the database
+claimed_postings = set()
+
+# Unread alert counts per recipient, seeded from the database on first read and then
+# kept current by the writers; the lock orders seeding against sends and mark-as-read
+unread_alert_counts = {}
+unread_alert_counts_lock = threading.Lock()
+
+# Top-k recommendations per user as (posting_id, similarity_score, distance), rebuilt in
+# the background by precompute_recommendations so the endpoint is a lookup
+precomputed_recommendations = {}
+recommendation_job_state = {
+    'vectorizer': None,
+    'posting_matrix': None,
+    'postings': {},
+    'user_fingerprints': {},
+    'stats': {}
+}
+
+# Last live recommendations served per user, returned when the refit path is shed
+last_recommendations = {}
+
+# Searches wider than this many km cost extra admission units
+WIDE_RADIUS_KM = 10
+
+recommendation_gate = AdmissionGate('recommendations', capacity=2, max_queue=4, max_wait=2.0)
+alert_gate = AdmissionGate('alert_nearby_users', capacity=2, max_queue=8, max_wait=2.0)
+food_postings_gate = AdmissionGate('food_postings_wide', capacity=8, max_queue=16, max_wait=1.0)
+admission_gates = [recommendation_gate, alert_gate, food_postings_gate]
+
+def food_postings_cost():
+    """Nearby searches are free; wider ones cost one unit per WIDE_RADIUS_KM of radius"""
+    radius = float(request.args.get('radius', 10))
+    if radius <= WIDE_RADIUS_KM:
+        return 0
+    # inf and nan are treated as the widest possible search
+    if not np.isfinite(radius):
+        return food_postings_gate.capacity
+    return int(min(np.ceil(radius / WIDE_RADIUS_KM), food_postings_gate.capacity))
+
 # API Routes
 @app.route('/')
 def index():
@@ -329,6 +485,7 @@ def login():
     return jsonify({'error': 'Invalid credentials'}), 401
 
 @app.route('/api/food-postings', methods=['GET'])
+@admission_controlled(food_postings_gate, cost=food_postings_cost)
 def get_food_postings():
     lat = float(request.args.get('lat', 0))
     lng = float(request.args.get('lng', 0))
@@ -370,39 +527,79 @@ def create_food_posting():
     db.session.add(posting)
     db.session.commit()
     
-    # Retrain ML engine with new data
-    update_ml_engine()
-    
     return jsonify({'message': 'Food posting created successfully', 'posting': posting.to_dict()})
 
 @app.route('/api/recommendations/<int:user_id>', methods=['GET'])
 def get_recommendations(user_id):
     user = User.query.get_or_404(user_id)
-    user_location = (user.latitude, user.longitude)
-    user_preferences = json.loads(user.preferences) if user.preferences else []
     
-    # Get all available postings for ML training
-    postings = FoodPosting.query.filter_by(is_available=True).all()
-    posting_data = [posting.to_dict() for posting in postings]
+    # Serve the background job's result when it has one for this user
+    precomputed = precomputed_recommendations.get(user_id)
+    if precomputed is not None:
+        return jsonify(load_precomputed_recommendations(precomputed))
     
-    # Train ML engine and get recommendations
-    ml_engine.train(posting_data)
-    recommendations = ml_engine.get_recommendations(user_preferences, user_location)
+    # Under load, degrade to the last result this user was served instead of refitting
+    if not recommendation_gate.acquire():
+        return degraded_recommendations(user_id)
     
+    try:
+        user_location = (user.latitude, user.longitude)
+        user_preferences = json.loads(user.preferences) if user.preferences else []
+        
+        # Get all available postings for ML training
+        postings = FoodPosting.query.filter_by(is_available=True).all()
+        posting_data = [posting.to_dict() for posting in postings]
+        
+        # Train ML engine and get recommendations on the ML worker
+        future = ml_executor.submit(train_and_recommend, posting_data, user_preferences, user_location)
+        try:
+            recommendations = future.result(timeout=ML_RESULT_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            return degraded_recommendations(user_id)
+    finally:
+        recommendation_gate.release()
+    
+    last_recommendations[user_id] = recommendations
     return jsonify(recommendations)
 
 @app.route('/api/claim-food', methods=['POST'])
 def claim_food():
     data = request.get_json()
+    posting_id = data['posting_id']
+    
+    # Fast path: once a posting is taken, later claimers are turned away without a write
+    if posting_id in claimed_postings:
+        return jsonify({'error': 'Food has already been claimed'}), 409
+    
+    # Conditional UPDATE decides the race: only the first claimer flips is_available
+    won = FoodPosting.query.filter(
+        FoodPosting.id == posting_id,
+        FoodPosting.is_available == True,
+        FoodPosting.available_until >= datetime.utcnow()
+    ).update({'is_available': False}, synchronize_session=False)
+    
+    if not won:
+        db.session.rollback()
+        posting = FoodPosting.query.get(posting_id)
+        if not posting:
+            return jsonify({'error': 'Food posting not found'}), 404
+        if FoodClaim.query.filter_by(posting_id=posting_id).first():
+            claimed_postings.add(posting_id)
+            return jsonify({'error': 'Food has already been claimed'}), 409
+        if posting.available_until < datetime.utcnow():
+            return jsonify({'error': 'Food posting has expired'}), 410
+        return jsonify({'error': 'Food is no longer available'}), 409
     
     claim = FoodClaim(
-        posting_id=data['posting_id'],
+        posting_id=posting_id,
         claimer_id=data['claimer_id'],
         message=data.get('message', '')
     )
     
     db.session.add(claim)
     db.session.commit()
+    claimed_postings.add(posting_id)
     
     return jsonify({'message': 'Food claimed successfully', 'claim': claim.to_dict()})
 
@@ -416,11 +613,15 @@ def update_location():
         user.longitude = data['longitude']
         db.session.commit()
         
+        # Stored recommendations were ranked for the old location
+        precomputed_recommendations.pop(user.id, None)
+        
         return jsonify({'message': 'Location updated successfully'})
     
     return jsonify({'error': 'User not found'}), 404
 
 @app.route('/api/alert-nearby-users', methods=['POST'])
+@admission_controlled(alert_gate)
 def alert_nearby_users():
     data = request.get_json()
     user_id = data.get('user_id')
@@ -441,6 +642,7 @@ def alert_nearby_users():
     if location:
         alert_sender.latitude = location.get('latitude', alert_sender.latitude)
         alert_sender.longitude = location.get('longitude', alert_sender.longitude)
+        precomputed_recommendations.pop(alert_sender.id, None)
     
     # Find nearby users (within 5km radius)
     sender_location = (alert_sender.latitude, alert_sender.longitude)
@@ -494,7 +696,12 @@ def alert_nearby_users():
             'image_captured': camera_used
         })
     
-    db.session.commit()
+    # Read ids before committing; the commit expires every User and .id would reload each
+    recipient_ids = [nearby_user_data['user'].id for nearby_user_data in nearby_users]
+    with unread_alert_counts_lock:
+        db.session.commit()
+        for recipient_id in recipient_ids:
+            adjust_unread_alert_count(recipient_id, 1)
     
     # Create a summary response
     response_message = f'Alert sent to {len(alerts_sent)} nearby users'
@@ -512,6 +719,105 @@ def alert_nearby_users():
         }
     })
 
+@app.route('/api/admin/load', methods=['GET'])
+def get_load_status():
+    """Queue depth and shed counts for the admission-controlled endpoints"""
+    return jsonify({
+        'gates': {gate.name: gate.stats() for gate in admission_gates},
+        'recommendation_job': recommendation_job_state['stats']
+    })
+
+# Alert Inbox API Routes
+@app.route('/api/alerts/<int:user_id>', methods=['GET'])
+def get_user_alerts(user_id):
+    """Get a user's alerts newest-first using keyset pagination"""
+    user = User.query.get_or_404(user_id)
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        before_id = int(request.args.get('before_id', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and before_id must be integers'}), 400
+    
+    try:
+        since = parse_iso_arg('since')
+        before = parse_iso_arg('before')
+    except ValueError:
+        return jsonify({'error': 'since and before must be ISO 8601 timestamps'}), 400
+    
+    # The recipient is already in the session, so only the sender needs joining
+    query = UserAlert.query.options(db.joinedload(UserAlert.sender)).filter(
+        UserAlert.recipient_id == user.id
+    )
+    
+    # Cheap polling: only alerts newer than what the client has already seen
+    if since:
+        query = query.filter(UserAlert.created_at > since)
+    
+    # Resume after the last alert of the previous page
+    if before:
+        query = query.filter(db.or_(
+            UserAlert.created_at < before,
+            db.and_(UserAlert.created_at == before, UserAlert.id < before_id)
+        ))
+    
+    if request.args.get('unread_only') == 'true':
+        query = query.filter(UserAlert.is_read == False)
+    
+    alerts = query.order_by(UserAlert.created_at.desc(), UserAlert.id.desc()).limit(limit + 1).all()
+    has_more = len(alerts) > limit
+    alerts = alerts[:limit]
+    
+    next_cursor = None
+    if has_more:
+        next_cursor = {
+            'before': alerts[-1].created_at.isoformat(),
+            'before_id': alerts[-1].id
+        }
+    
+    return jsonify({
+        'alerts': [alert.to_dict() for alert in alerts],
+        'unread_count': get_unread_alert_count(user.id),
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/alerts/<int:user_id>/unread-count', methods=['GET'])
+def get_user_unread_alert_count(user_id):
+    """Get the number of unread alerts for a user"""
+    User.query.get_or_404(user_id)
+    return jsonify({'unread_count': get_unread_alert_count(user_id)})
+
+@app.route('/api/alerts/<int:user_id>/read', methods=['POST'])
+def mark_user_alerts_read(user_id):
+    """Mark the given alerts, or all of a user's alerts, as read"""
+    User.query.get_or_404(user_id)
+    data = request.get_json(silent=True) or {}
+    alert_ids = data.get('alert_ids')
+    
+    if alert_ids is not None and not (
+        isinstance(alert_ids, list)
+        and all(isinstance(alert_id, int) and not isinstance(alert_id, bool) for alert_id in alert_ids)
+    ):
+        return jsonify({'error': 'alert_ids must be a list of integers'}), 400
+    
+    query = UserAlert.query.filter(
+        UserAlert.recipient_id == user_id,
+        UserAlert.is_read == False
+    )
+    if alert_ids is not None:
+        query = query.filter(UserAlert.id.in_(alert_ids))
+    
+    with unread_alert_counts_lock:
+        marked = query.update({'is_read': True}, synchronize_session=False)
+        db.session.commit()
+        adjust_unread_alert_count(user_id, -marked)
+    
+    return jsonify({
+        'message': f'{marked} alerts marked as read',
+        'marked_read': marked,
+        'unread_count': get_unread_alert_count(user_id)
+    })
+
 # Food Posts API Routes (Twitter-like functionality)
 @app.route('/api/food-posts', methods=['GET'])
 def get_food_posts_list():
@@ -519,13 +825,31 @@ def get_food_posts_list():
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 10))
     user_id = request.args.get('user_id')  # Filter by user if provided
+    food_type = request.args.get('food_type')  # Filter by food type if provided
+    sort = request.args.get('sort', 'recent')  # 'recent' or 'ranked'
+    
+    if sort == 'ranked':
+        rank_filters = []
+        if user_id:
+            rank_filters.append(FoodPostRank.user_id == user_id)
+        if food_type:
+            rank_filters.append(FoodPostRank.food_type == food_type)
+        query = FoodPost.query.join(FoodPostRank).filter(*rank_filters).order_by(
+            FoodPostRank.score.desc(), FoodPostRank.post_id.desc()
+        )
+    elif sort == 'recent':
+        query = FoodPost.query.order_by(FoodPost.created_at.desc())
+        if user_id:
+            query = query.filter_by(user_id=user_id)
+        if food_type:
+            query = query.filter_by(food_type=food_type)
+    else:
+        return jsonify({'error': "sort must be 'recent' or 'ranked'"}), 400
     
-    query = FoodPost.query.order_by(FoodPost.created_at.desc())
-    
-    if user_id:
-        query = query.filter_by(user_id=user_id)
-    
-    posts = query.paginate(page=page, per_page=per_page, error_out=False)
+    posts = query.paginate(page=page, per_page=per_page, error_out=False, count=sort != 'ranked')
+    if sort == 'ranked':
+        # Count off the rank table's index; counting through the join visits every post
+        posts.total = FoodPostRank.query.filter(*rank_filters).count()
     
     # Check if current user liked each post
     current_user_id = request.args.get('current_user_id')
@@ -568,10 +892,11 @@ def create_food_post_item():
         content=data['content'],
         food_type=food_type,
         image_url=data.get('image_url'),
-        rating=data.get('rating', 0)
+        rating=rating_value(data.get('rating', 0))
     )
     
     db.session.add(post)
+    update_food_post_rank(post)
     db.session.commit()
     
     return jsonify({
@@ -612,8 +937,9 @@ def update_food_post(post_id):
     
     post.title = data.get('title', post.title)
     post.content = data.get('content', post.content)
-    post.rating = data.get('rating', post.rating)
+    post.rating = rating_value(data['rating']) if 'rating' in data else post.rating
     post.image_url = data.get('image_url', post.image_url)
+    update_food_post_rank(post)
     
     db.session.commit()
     
@@ -663,6 +989,7 @@ def like_food_post(post_id):
         post.likes_count += 1
         action = 'liked'
     
+    update_food_post_rank(post)
     db.session.commit()
     
     return jsonify({
@@ -687,6 +1014,7 @@ def add_comment_to_post(post_id):
     # Update comments count
     post = FoodPost.query.get(post_id)
     post.comments_count += 1
+    update_food_post_rank(post)
     
     db.session.commit()
     
@@ -720,6 +1048,7 @@ def delete_comment(post_id, comment_id):
     # Update comments count
     post = FoodPost.query.get(post_id)
     post.comments_count = max(0, post.comments_count - 1)
+    update_food_post_rank(post)
     
     db.session.commit()
     
@@ -740,22 +1069,267 @@ def cleanup_expired_postings():
         
         time.sleep(300)  # Check every 5 minutes
 
-def update_ml_engine():
-    """Update ML engine with current data"""
+def haversine_km(lat, lng, lats, lngs):
+    """Vectorised great-circle distance in km; arguments broadcast like numpy arrays"""
+    lat, lng, lats, lngs = map(np.radians, (lat, lng, lats, lngs))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * 6371.0088 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def preference_text(preferences):
+    """Space-joined terms from a stored preferences JSON list; malformed rows count as empty"""
+    try:
+        terms = json.loads(preferences) if preferences else []
+    except ValueError:
+        return ''
+    return ' '.join(map(str, terms)) if isinstance(terms, list) else ''
+
+def precompute_recommendations(top_k=5, max_distance=10, block_size=256):
+    """Refresh stored top-k recommendations for users whose inputs changed.
+    
+    A user is refreshed when their location or preferences changed, or when a
+    posting within max_distance of them appeared or went away. Preference vectors
+    for those users are multiplied against the posting TF-IDF matrix in blocks of
+    block_size users, masked by distance, and reduced to the top_k postings.
+    """
+    started = time.perf_counter()
+    state = recommendation_job_state
+    
     with app.app_context():
-        postings = FoodPosting.query.filter_by(is_available=True).all()
-        posting_data = [posting.to_dict() for posting in postings]
-        ml_engine.train(posting_data)
+        postings = db.session.query(
+            FoodPosting.id, FoodPosting.title, FoodPosting.description, FoodPosting.food_type,
+            FoodPosting.latitude, FoodPosting.longitude
+        ).filter_by(is_available=True).order_by(FoodPosting.id).all()
+        users = db.session.query(
+            User.id, User.latitude, User.longitude, User.preferences
+        ).all()
+    
+    current_postings = {p.id: (p.latitude, p.longitude) for p in postings}
+    previous_postings = state['postings']
+    changed_locations = [
+        current_postings.get(pid) or previous_postings[pid]
+        for pid in current_postings.keys() ^ previous_postings.keys()
+    ]
+    
+    # Refit only when inventory changed; users far from every change keep their lists.
+    # The new fit is only saved to state once the whole run succeeds, so a failed run
+    # leaves the change set in place for the next one
+    vectorizer, posting_matrix = state['vectorizer'], state['posting_matrix']
+    if changed_locations or vectorizer is None:
+        vectorizer = posting_matrix = None
+        if postings:
+            try:
+                vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+                posting_matrix = vectorizer.fit_transform([
+                    f"{p.title} {p.description} {p.food_type}" for p in postings
+                ])
+            except ValueError:
+                vectorizer = posting_matrix = None
+    
+    posting_ids = np.array([p.id for p in postings])
+    posting_lats = np.array([p.latitude for p in postings], dtype=float)
+    posting_lngs = np.array([p.longitude for p in postings], dtype=float)
+    
+    fingerprints = {u.id: (u.latitude, u.longitude, u.preferences) for u in users}
+    for user_id in precomputed_recommendations.keys() - fingerprints.keys():
+        precomputed_recommendations.pop(user_id, None)
+    
+    dirty_users = [
+        u for u in users
+        if state['user_fingerprints'].get(u.id) != fingerprints[u.id]
+        or u.id not in precomputed_recommendations
+    ]
+    if changed_locations and users:
+        changed = np.array(changed_locations, dtype=float)
+        user_lats = np.array([u.latitude or 0.0 for u in users], dtype=float)[:, None]
+        user_lngs = np.array([u.longitude or 0.0 for u in users], dtype=float)[:, None]
+        near_change = (haversine_km(user_lats, user_lngs, changed[:, 0], changed[:, 1]) <= max_distance).any(axis=1)
+        dirty_ids = {u.id for u in dirty_users}
+        dirty_users += [u for u, near in zip(users, near_change) if near and u.id not in dirty_ids]
+    
+    for start in range(0, len(dirty_users), block_size):
+        block = dirty_users[start:start + block_size]
+        
+        if vectorizer is None:
+            for u in block:
+                precomputed_recommendations[u.id] = []
+            continue
+        
+        preference_texts = [preference_text(u.preferences) for u in block]
+        # Rows are L2-normalised on both sides, so the product is cosine similarity
+        user_matrix = vectorizer.transform(preference_texts)
+        scores = (user_matrix @ posting_matrix.T).toarray()
+        
+        block_lats = np.array([u.latitude or 0.0 for u in block], dtype=float)[:, None]
+        block_lngs = np.array([u.longitude or 0.0 for u in block], dtype=float)[:, None]
+        distances = haversine_km(block_lats, block_lngs, posting_lats, posting_lngs)
+        scores[distances > max_distance] = -np.inf
+        
+        k = min(top_k, scores.shape[1])
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, u in enumerate(block):
+            picked = [c for c in candidates[row] if scores[row, c] > -np.inf]
+            picked.sort(key=lambda c: (-scores[row, c], distances[row, c]))
+            precomputed_recommendations[u.id] = [
+                (int(posting_ids[c]), float(scores[row, c]), float(distances[row, c]))
+                for c in picked
+            ]
+    
+    state['postings'] = current_postings
+    state['vectorizer'] = vectorizer
+    state['posting_matrix'] = posting_matrix
+    state['user_fingerprints'] = fingerprints
+    elapsed = time.perf_counter() - started
+    state['stats'] = {
+        'users_refreshed': len(dirty_users),
+        'postings': len(postings),
+        'seconds': elapsed,
+        'users_per_second': len(dirty_users) / elapsed if elapsed > 0 else 0.0,
+        'finished_at': datetime.utcnow().isoformat()
+    }
+    app.logger.info(
+        'Refreshed recommendations for %d users in %.3fs (%.0f users/s)',
+        len(dirty_users), elapsed, state['stats']['users_per_second']
+    )
+    return state['stats']
+
+def load_precomputed_recommendations(entries):
+    """Turn stored (posting_id, score, distance) entries into the API response"""
+    postings = FoodPosting.query.options(db.joinedload(FoodPosting.user)).filter(
+        FoodPosting.id.in_([posting_id for posting_id, _, _ in entries]),
+        FoodPosting.is_available == True
+    ).all()
+    postings_by_id = {posting.id: posting for posting in postings}
+    
+    return [
+        {
+            'posting': postings_by_id[posting_id].to_dict(),
+            'similarity_score': score,
+            'distance': distance
+        }
+        for posting_id, score, distance in entries
+        if posting_id in postings_by_id
+    ]
+
+def refresh_recommendations_periodically():
+    while True:
+        try:
+            precompute_recommendations()
+        except Exception:
+            app.logger.exception('Recommendation refresh failed')
+        
+        time.sleep(60)  # Refresh every minute
+
+def start_background_jobs():
+    """Start the cleanup and recommendation refresh threads"""
+    for target in (cleanup_expired_postings, refresh_recommendations_periodically):
+        threading.Thread(target=target, daemon=True).start()
+
+def degraded_recommendations(user_id):
+    """Last result served to this user, or a 503 when there is none"""
+    if user_id in last_recommendations:
+        response = jsonify(last_recommendations[user_id])
+        response.headers['X-Recommendations-Degraded'] = 'cached'
+        return response
+    return shed_response(recommendation_gate)
+
+def train_and_recommend(posting_data, user_preferences, user_location):
+    """Refit the ML engine and score one user; only call this on ml_executor"""
+    ml_engine.train(posting_data)
+    return ml_engine.get_recommendations(user_preferences, user_location)
+
+def parse_iso_arg(name):
+    """Parse an optional ISO 8601 query argument into a datetime"""
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+def get_unread_alert_count(user_id):
+    """Return the cached unread alert count, seeding it with one COUNT on first use"""
+    with unread_alert_counts_lock:
+        if user_id not in unread_alert_counts:
+            unread_alert_counts[user_id] = UserAlert.query.filter(
+                UserAlert.recipient_id == user_id,
+                UserAlert.is_read == False
+            ).count()
+        return unread_alert_counts[user_id]
+
+def adjust_unread_alert_count(user_id, delta):
+    """Apply a change to a cached unread count; hold unread_alert_counts_lock"""
+    if user_id in unread_alert_counts:
+        unread_alert_counts[user_id] = max(0, unread_alert_counts[user_id] + delta)
+
+# Each tenfold increase in engagement is worth this many seconds of recency
+FEED_RANK_DECAY_SECONDS = 45000
+
+# created_at is naive UTC, so measure recency from a naive UTC epoch rather than
+# datetime.timestamp(), which would read it as local time
+FEED_RANK_EPOCH = datetime(1970, 1, 1)
+
+def rating_value(rating):
+    """Rating from client input or the database as an int; anything unparseable counts as 0"""
+    try:
+        return int(float(rating or 0))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+def food_post_score(post):
+    """Time-decayed engagement score for the ranked feed.
+    
+    Recency enters as seconds since FEED_RANK_EPOCH / FEED_RANK_DECAY_SECONDS rather
+    than as a decay applied at read time, so older posts sink without their scores
+    being rewritten. post may be a FoodPost or any row with the same columns.
+    """
+    engagement = int(post.likes_count or 0) + 2 * int(post.comments_count or 0) + rating_value(post.rating)
+    created_at = post.created_at or datetime.utcnow()
+    recency = (created_at - FEED_RANK_EPOCH).total_seconds() / FEED_RANK_DECAY_SECONDS
+    return float(np.log10(1 + max(engagement, 0)) + recency)
+
+def update_food_post_rank(post):
+    """Recompute a post's feed score; call before committing the change that caused it"""
+    score = food_post_score(post)
+    if post.rank is None:
+        post.rank = FoodPostRank(user_id=post.user_id, food_type=post.food_type, score=score)
+    else:
+        post.rank.score = score
 
 def init_db():
     with app.app_context():
         db.create_all()
+        
+        # create_all skips tables that already exist, so add any newer indexes
+        for index in UserAlert.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+        
+        # Backfill feed scores for posts created before ranking existed; plain column
+        # rows, id-keyset batches and bulk inserts keep this to two statements per batch
+        last_id = 0
+        while True:
+            unranked = db.session.query(
+                FoodPost.id, FoodPost.user_id, FoodPost.food_type, FoodPost.likes_count,
+                FoodPost.comments_count, FoodPost.rating, FoodPost.created_at
+            ).outerjoin(FoodPostRank).filter(
+                FoodPost.id > last_id,
+                FoodPostRank.post_id == None
+            ).order_by(FoodPost.id).limit(10000).all()
+            if not unranked:
+                break
+            last_id = unranked[-1].id
+            db.session.bulk_insert_mappings(FoodPostRank, [
+                {
+                    'post_id': post.id,
+                    'user_id': post.user_id,
+                    'food_type': post.food_type,
+                    'score': food_post_score(post)
+                }
+                for post in unranked
+            ])
+            db.session.commit()
 
 if __name__ == '__main__':
     init_db()
     
-    # Start background thread for cleanup
-    cleanup_thread = threading.Thread(target=cleanup_expired_postings, daemon=True)
-    cleanup_thread.start()
+    # Start background threads for cleanup and recommendation refresh, only in the
+    # reloader's serving child so the watcher process doesn't run them too
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
     
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,83 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+Run as `python bench/_util.py <threaded|waitress> <port> [ungated]` to serve the app in a child process.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def temp_database():
+    """Point the app at a fresh SQLite file; call this before importing app"""
+    directory = tempfile.mkdtemp(prefix='food_alert_bench_')
+    path = os.path.join(directory, 'bench.db')
+    os.environ['FOOD_ALERT_DATABASE_URI'] = 'sqlite:///' + path
+    return path
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, ungated=False, timeout=30):
+    """Serve the app on port with the threaded dev server or waitress in a child process.
+    
+    ungated lifts every admission gate limit, to compare against the baseline behaviour.
+    """
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), mode, str(port)] + (['ungated'] if ungated else []),
+        env=os.environ.copy(),
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start on port {port}')
+
+
+def stop_server(process):
+    process.terminate()
+    process.wait(timeout=10)
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+if __name__ == '__main__':
+    import logging
+
+    mode, port = sys.argv[1], int(sys.argv[2])
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+
+    if 'ungated' in sys.argv[3:]:
+        from app import admission_gates
+        for gate in admission_gates:
+            gate.capacity = gate.max_queue = sys.maxsize
+
+    if mode == 'threaded':
+        from app import app
+        app.run(host='127.0.0.1', port=port, debug=False, threaded=True)
+    elif mode == 'waitress':
+        from main import serve_production
+        serve_production(host='127.0.0.1', port=port)
+    else:
+        sys.exit(f'unknown server mode: {mode}')
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Claim race benchmark: N users claim the same posting at once.
+
+Each round creates a fresh posting and fires N concurrent POST /api/claim-food
+requests at a real server. It asserts that exactly one claim is accepted (one 200,
+N-1 409s, one FoodClaim row) and reports claim throughput.
+
+    python bench/claim_race.py --claimers 200 --rounds 5
+"""
+
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from _util import free_port, percentile, start_server, stop_server, temp_database
+
+
+def post(port, path, body):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}{path}',
+        data=json.dumps(body).encode(),
+        headers={'Content-Type': 'application/json'}
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return status, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--claimers', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--server', default='waitress', choices=['threaded', 'waitress'])
+    args = parser.parse_args()
+
+    temp_database()
+    from app import app, db, init_db, User, FoodPosting, FoodClaim
+
+    init_db()
+    with app.app_context():
+        db.session.add_all([
+            User(username=f'claimer{i}', email=f'claimer{i}@example.com', password='bench')
+            for i in range(args.claimers)
+        ])
+        db.session.commit()
+
+    port = free_port()
+    server = start_server(args.server, port)
+    try:
+        with ThreadPoolExecutor(max_workers=args.claimers) as pool:
+            for round_number in range(1, args.rounds + 1):
+                with app.app_context():
+                    posting = FoodPosting(
+                        user_id=1, title='Party jollof', description='Trays of rice', food_type='grains',
+                        quantity='20 plates', latitude=6.5244, longitude=3.3792,
+                        available_until=datetime.utcnow() + timedelta(hours=2)
+                    )
+                    db.session.add(posting)
+                    db.session.commit()
+                    posting_id = posting.id
+
+                started = time.perf_counter()
+                results = list(pool.map(
+                    lambda claimer_id: post(port, '/api/claim-food', {'posting_id': posting_id, 'claimer_id': claimer_id}),
+                    range(1, args.claimers + 1)
+                ))
+                elapsed = time.perf_counter() - started
+
+                statuses = Counter(status for status, _ in results)
+                with app.app_context():
+                    claim_rows = FoodClaim.query.filter_by(posting_id=posting_id).count()
+
+                assert statuses == Counter({200: 1, 409: args.claimers - 1}), statuses
+                assert claim_rows == 1, claim_rows
+
+                latencies = [seconds for _, seconds in results]
+                print(
+                    f'round {round_number}: {args.claimers} claimers, 1 accepted, '
+                    f'{args.claimers / elapsed:.0f} claims/s, '
+                    f'p50 {percentile(latencies, 0.5) * 1000:.0f}ms, p99 {percentile(latencies, 0.99) * 1000:.0f}ms'
+                )
+    finally:
+        stop_server(server)
+
+
+if __name__ == '__main__':
+    main()
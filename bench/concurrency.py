@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark: the threaded dev server against the waitress production mode.
+
+Opens --connections simultaneous clients that each send half a request, stay idle
+for --idle seconds like a slow mobile client, then finish the request. Reports how
+many completed, throughput and latency percentiles for each server.
+
+    python bench/concurrency.py --connections 1000 --idle 2
+"""
+
+import argparse
+import asyncio
+import time
+
+from _util import free_port, percentile, start_server, stop_server, temp_database
+
+
+async def slow_client(port, path, idle, timeout):
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'.encode())
+        await writer.drain()
+        await asyncio.sleep(idle)
+        writer.write(b'Connection: close\r\n\r\n')
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+        status = int(response.split(b' ', 2)[1])
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        status = None
+    return status, time.perf_counter() - started
+
+
+async def run_load(port, args):
+    clients = [slow_client(port, args.path, args.idle, args.timeout) for _ in range(args.connections)]
+    return await asyncio.gather(*clients)
+
+
+def seed(posts):
+    from app import app, db, init_db, User, FoodPost
+
+    init_db()
+    with app.app_context():
+        db.session.add(User(username='bench', email='bench@example.com', password='bench'))
+        db.session.commit()
+        for i in range(posts):
+            db.session.add(FoodPost(user_id=1, title=f'Jollof rice {i}', content='Leftover party rice', food_type='grains'))
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--idle', type=float, default=2.0, help='seconds each client waits mid-request')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--path', default='/api/food-posts')
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--servers', default='threaded,waitress')
+    args = parser.parse_args()
+
+    temp_database()
+    seed(args.posts)
+
+    print(f'{args.connections} connections, {args.idle}s idle each, GET {args.path}')
+    for mode in args.servers.split(','):
+        port = free_port()
+        server = start_server(mode, port)
+        try:
+            started = time.perf_counter()
+            results = asyncio.run(run_load(port, args))
+            elapsed = time.perf_counter() - started
+        finally:
+            stop_server(server)
+
+        ok = [seconds for status, seconds in results if status == 200]
+        print(
+            f'{mode:>9}: {len(ok)}/{len(results)} ok in {elapsed:.1f}s '
+            f'({len(ok) / elapsed:.0f} req/s), '
+            f'p50 {percentile(ok, 0.5) * 1000:.0f}ms, p99 {percentile(ok, 0.99) * 1000:.0f}ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
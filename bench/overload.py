@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Overload scenario: cheap reads next to a flood of expensive calls.
+
+Many clients hammer POST /api/alert-nearby-users (a full user scan plus fan-out)
+while a few clients poll GET /api/food-posts. The run is repeated with admission
+control lifted, then with it on, reporting cheap-endpoint tail latency and how
+many expensive calls were shed.
+
+    python bench/overload.py --users 3000 --duration 8
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from _util import free_port, percentile, start_server, stop_server, temp_database
+
+
+def call(port, path, body=None):
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}{path}',
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={'Content-Type': 'application/json'}
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return status, time.perf_counter() - started
+
+
+def load_users(path, users):
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        'INSERT INTO user (id, username, email, password, latitude, longitude, preferences, created_at) '
+        "VALUES (?, ?, ?, 'bench', ?, ?, '[]', ?)",
+        (
+            (i, f'user{i}', f'user{i}@example.com',
+             6.5244 + random.uniform(-1, 1), 3.3792 + random.uniform(-1, 1), datetime.utcnow())
+            for i in range(1, users + 1)
+        )
+    )
+    connection.commit()
+    connection.close()
+
+
+def run(args, ungated):
+    port = free_port()
+    server = start_server(args.server, port, ungated=ungated)
+    stop_at = time.time() + args.duration
+
+    def expensive():
+        results = []
+        while time.time() < stop_at:
+            results.append(call(port, '/api/alert-nearby-users', {
+                'user_id': random.randint(1, args.users), 'message': 'Rice at the church hall'
+            }))
+        return results
+
+    def cheap():
+        results = []
+        while time.time() < stop_at:
+            results.append(call(port, '/api/food-posts'))
+            time.sleep(0.02)
+        return results
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.expensive_clients + args.cheap_clients) as pool:
+            expensive_futures = [pool.submit(expensive) for _ in range(args.expensive_clients)]
+            cheap_futures = [pool.submit(cheap) for _ in range(args.cheap_clients)]
+            expensive_results = [r for future in expensive_futures for r in future.result()]
+            cheap_results = [r for future in cheap_futures for r in future.result()]
+        load = json.loads(urllib.request.urlopen(f'http://127.0.0.1:{port}/api/admin/load').read())
+    finally:
+        stop_server(server)
+
+    cheap_latencies = [seconds for _, seconds in cheap_results]
+    shed_latencies = [seconds for status, seconds in expensive_results if status == 503]
+    label = 'ungated' if ungated else 'gated'
+    print(
+        f'{label:>8}: cheap n={len(cheap_results)} '
+        f'p50 {percentile(cheap_latencies, 0.5) * 1000:.0f}ms p99 {percentile(cheap_latencies, 0.99) * 1000:.0f}ms | '
+        f'expensive {dict(Counter(status for status, _ in expensive_results))}, '
+        f'shed p50 {percentile(shed_latencies, 0.5) * 1000:.0f}ms | '
+        f"gate {load['gates']['alert_nearby_users']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=3000)
+    parser.add_argument('--duration', type=float, default=8.0)
+    parser.add_argument('--expensive-clients', type=int, default=32)
+    parser.add_argument('--cheap-clients', type=int, default=4)
+    parser.add_argument('--server', default='threaded', choices=['threaded', 'waitress'])
+    args = parser.parse_args()
+
+    random.seed(42)
+    path = temp_database()
+    from app import init_db
+
+    init_db()
+    load_users(path, args.users)
+
+    run(args, ungated=True)
+    run(args, ungated=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Ranked feed benchmark: page latency for GET /api/food-posts at a large post count.
+
+Bulk-loads --posts FoodPost rows with raw SQLite inserts, lets init_db backfill
+their feed scores, then times ranked pages (plain, per food_type, per author and
+deep pages) next to the existing newest-first feed.
+
+    python bench/ranked_feed.py --posts 1000000
+"""
+
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from _util import percentile, temp_database
+
+FOOD_TYPES = ['fruits', 'vegetables', 'grains', 'protein', 'dairy', 'snacks', 'beverages', 'prepared']
+
+
+def load_posts(path, posts, authors):
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        'INSERT INTO user (id, username, email, password, latitude, longitude, preferences, created_at) '
+        "VALUES (?, ?, ?, 'bench', 6.5244, 3.3792, '[]', ?)",
+        ((i, f'author{i}', f'author{i}@example.com', datetime.utcnow()) for i in range(1, authors + 1))
+    )
+    now = datetime.utcnow()
+    connection.executemany(
+        'INSERT INTO food_post (id, user_id, title, content, food_type, rating, likes_count, comments_count, created_at) '
+        "VALUES (?, ?, 'Shared meal', 'Leftovers up for grabs', ?, ?, ?, ?, ?)",
+        (
+            (
+                i, random.randint(1, authors), random.choice(FOOD_TYPES), random.randint(0, 5),
+                int(random.paretovariate(1.5)) - 1, int(random.paretovariate(2)) - 1,
+                now - timedelta(seconds=random.randint(0, 90 * 86400))
+            )
+            for i in range(1, posts + 1)
+        )
+    )
+    connection.commit()
+    connection.close()
+
+
+def time_page(client, query, repeats):
+    client.get('/api/food-posts?' + query)
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.get('/api/food-posts?' + query)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--authors', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(42)
+    path = temp_database()
+    from app import app, init_db
+
+    init_db()
+    started = time.perf_counter()
+    load_posts(path, args.posts, args.authors)
+    print(f'loaded {args.posts} posts in {time.perf_counter() - started:.1f}s')
+
+    started = time.perf_counter()
+    init_db()
+    print(f'backfilled feed scores in {time.perf_counter() - started:.1f}s')
+
+    client = app.test_client()
+    for query in [
+        'sort=ranked',
+        'sort=ranked&food_type=prepared',
+        'sort=ranked&user_id=7',
+        'sort=ranked&page=50',
+        'sort=ranked&page=5000',
+        'sort=recent',
+    ]:
+        timings = time_page(client, query, args.repeats)
+        print(
+            f'{query:<32} p50 {percentile(timings, 0.5) * 1000:7.1f}ms  '
+            f'p99 {percentile(timings, 0.99) * 1000:7.1f}ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
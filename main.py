@@ -10,7 +10,35 @@ import os
 # Add the current directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, init_db
+from app import app, init_db, start_background_jobs
+
+
+def serve_production(host='0.0.0.0', port=5000):
+    """Serve through waitress instead of the Werkzeug dev server.
+
+    Waitress parks idle and slow connections on its async I/O loop and only hands
+    fully-read requests to the worker threads, so thousands of open clients don't
+    each hold a thread.
+    """
+    try:
+        from waitress import serve
+    except ImportError:
+        print("⚠️  waitress is not installed, falling back to the threaded dev server")
+        app.run(debug=False, host=host, port=port, threaded=True)
+        return
+
+    serve(
+        app,
+        host=host,
+        port=port,
+        threads=int(os.environ.get('FOOD_ALERT_THREADS', 16)),
+        connection_limit=int(os.environ.get('FOOD_ALERT_CONNECTION_LIMIT', 2000)),
+        backlog=2048,
+        channel_timeout=60,
+        # select() can't watch descriptors above 1024, which caps the connection limit
+        asyncore_use_poll=True,
+    )
+
 
 if __name__ == '__main__':
     print("🍽️  Starting Food Alert Application...")
@@ -23,12 +51,21 @@ if __name__ == '__main__':
     init_db()
     print("✅ Database initialized successfully!")
     
+    # The debug reloader runs this script in a watcher and a serving child;
+    # background jobs belong only in the process that serves requests
+    production = os.environ.get('FOOD_ALERT_ENV') == 'production'
+    if production or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
+    
     # Start the application
-    print("🚀 Starting server on http://localhost:5000")
+    print("🚀 Starting {} server on http://localhost:5000".format('production' if production else 'development'))
     print("💡 Press Ctrl+C to stop the server")
     print("-" * 50)
     # working
     try:
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        if production:
+            serve_production()
+        else:
+            app.run(debug=True, host='0.0.0.0', port=5000)
     except KeyboardInterrupt:
         print("\n👋 Food Alert server stopped. Thank you for making a difference!")
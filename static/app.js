@@ -391,7 +391,8 @@ async function claimFood(postingId) {
             showNotification('Food claimed successfully! The provider will contact you.', 'success');
             loadFoodPostings();
         } else {
-            showNotification('Error claiming food. Please try again.', 'danger');
+            showNotification(data.error || 'Error claiming food. Please try again.', 'danger');
+            loadFoodPostings();
         }
     } catch (error) {
         showNotification('Error claiming food. Please try again.', 'danger');